@@ -2,23 +2,27 @@
 # Copyright (C) 2026 Relational Network
 
 # app.py
+import fastapi
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, status, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import logging
-from typing import Optional, List, Dict, Any
-import uuid
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import secrets
+from datetime import datetime, timezone
 import asyncio
+import functools
 import sys
 from pathlib import Path
 
 # Add project root to sys.path to allow imports
 sys.path.append(str(Path(__file__).resolve().parent))
 
-from scripts.azure_deployer import AzureVMDeployer
+from scripts.azure_deployer import AzureVMDeployer, close_shared_clients
 from attestation.attestation_client import AttestationClient
+from store.deployment_store import ShardedStore
 from config import settings
+from utils.concurrency import run_blocking
 
 # Configure logging
 logging.basicConfig(
@@ -33,10 +37,18 @@ azure_logger.setLevel(logging.WARNING)
 http_logger = logging.getLogger("azure.core.pipeline.policies.http_logging_policy")
 http_logger.setLevel(logging.WARNING)
 
+# FastAPI 0.130+ serializes response models straight to JSON bytes with Pydantic
+# and deprecates ORJSONResponse, so orjson is only used on older releases
+if tuple(int(part) for part in fastapi.__version__.split(".")[:2]) >= (0, 130):
+    from fastapi.responses import JSONResponse as DefaultResponse
+else:
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+
 app = FastAPI(
     title="Relational Azure TEE DevOps Runner",
     description="API for deploying and managing Azure TEE VM instances",
     version="1.0.0",
+    default_response_class=DefaultResponse,
 )
 
 # Add CORS middleware
@@ -48,10 +60,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory store for tracking deployments
-# TODO: Replace with persistent storage in production.
-# TODO: Add concurrency protection (lock) or switch to an external store for multi-worker deployments.
-deployment_store = {}
+# Maximum number of VMs described concurrently by the list endpoint
+VM_LOOKUP_CONCURRENCY = 16
+
+# Store for tracking deployments. With REDIS_URL set, state is persisted in
+# Redis and deployments run on Dramatiq workers; otherwise both stay in-process.
+if settings.REDIS_URL:
+    import dramatiq
+    from dramatiq.brokers.redis import RedisBroker
+    from store.redis_store import RedisStore
+
+    dramatiq.set_broker(RedisBroker(url=settings.REDIS_URL))
+    deployment_store = RedisStore(settings.REDIS_URL, ttl=settings.DEPLOYMENT_TTL_SECS)
+else:
+    deployment_store = ShardedStore()
+
+def utcnow() -> datetime:
+    """Current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
 
 # Models for response
 class DeploymentResponse(BaseModel):
@@ -86,74 +112,137 @@ class AttestationResponse(BaseModel):
     vm_name: str
     host: Optional[str] = None
     details: Dict[str, Any]
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=utcnow)
 
-# Helper functions
-def get_deployer():
-    """Dependency to get a configured AzureVMDeployer instance"""
+# Shared clients, built once at startup and reused across requests
+app.state.deployer: Optional[AzureVMDeployer] = None
+attestation_client = AttestationClient(max_concurrency=settings.ATTEST_MAX_CONCURRENCY)
+
+@app.on_event("startup")
+async def init_deployer():
+    """Build the shared AzureVMDeployer so SDK pipelines and sessions are reused"""
     try:
-        return AzureVMDeployer()
+        app.state.deployer = AzureVMDeployer()
     except Exception as e:
         # TODO: Add structured error codes to help clients distinguish config/auth failures.
-        logger.error(f"Failed to initialize AzureVMDeployer: {e}")
+        logger.error("Failed to initialize AzureVMDeployer: %s", e)
+        app.state.deployer = None
+
+@app.on_event("shutdown")
+async def close_deployer():
+    """Release the shared Azure clients and their connection pool"""
+    app.state.deployer = None
+    close_shared_clients()
+
+# Helper functions
+def get_deployer():
+    """Dependency to get the shared AzureVMDeployer instance"""
+    deployer = app.state.deployer
+    if deployer is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to initialize Azure connection: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Azure connection is not initialized"
         )
+    return deployer
+
+# Steps the attest binary prints on success, in order, along with the error
+# reported if a step is missing. {host} and {port} are filled in per request.
+# TODO: Consider a more robust attestation verification method than stdout parsing.
+ATTESTATION_STEPS = (
+    ("Seeding the random number generator... ok", "Error: Seeding the random number generator failed."),
+    ("Connecting to tcp/{host}/{port}... ok", "Error: Connecting to tcp/{host}/{port} failed."),
+    ("Setting up the SSL/TLS structure... ok", "Error: Setting up the SSL/TLS structure failed."),
+    ("Setting certificate verification mode for RA-TLS... ok", "Error: Setting certificate verification mode for RA-TLS failed."),
+    ("Installing RA-TLS callback ... ok", "Error: Installing RA-TLS callback failed."),
+    ("Performing the SSL/TLS handshake...", "Error: Performing the SSL/TLS handshake failed."),
+    ("Handshake completed... ok", "Error: Handshake did not complete successfully."),
+    ("Verifying peer X.509 certificate... ok", "Error: Peer X.509 certificate verification failed."),
+    ("GET /health HTTP/1.1", "Error: GET /health HTTP/1.1 request not found."),
+    ("Host: {host}:{port}", "Error: Host header does not match expected value: Host: {host}:{port}."),
+    ("HTTP/1.1 200 OK", "Error: HTTP/1.1 200 OK response not received."),
+    ("Server is running", "Error: Server is not running as expected.")
+)
+
+@functools.lru_cache(maxsize=256)
+def attestation_steps_for(host: str, port: int) -> Tuple[Tuple[str, str], ...]:
+    """Fill in the expected attestation steps for an endpoint. Cached per endpoint."""
+    return tuple(
+        (expected.format(host=host, port=port), err_msg.format(host=host, port=port))
+        for expected, err_msg in ATTESTATION_STEPS
+    )
+
+def find_missing_attestation_step(stdout: str, host: str, port: int) -> Optional[str]:
+    """
+    Check that every expected step appears in stdout in order.
+    Returns the error message of the first missing step, or None if all are present.
+    """
+    # Each search starts where the previous step ended, so this is a single pass over stdout
+    current_index = 0
+    for expected, err_msg in attestation_steps_for(host, port):
+        pos = stdout.find(expected, current_index)
+        if pos == -1:
+            return err_msg
+        # Move current index forward so subsequent steps are expected to appear later.
+        current_index = pos + len(expected)
+    return None
 
 # Deployment task
 async def deploy_vm_task(
     request_id: str,
     vm_name: str,
+    deployer: AzureVMDeployer,
 ):
     """Background task to deploy a VM and run the setup script"""
-    deployer = AzureVMDeployer()
-    # TODO: Add retry/backoff for transient Azure API failures.
-    
     # Update deployment status
-    deployment_store[request_id]["vm_name"] = vm_name
-    deployment_store[request_id]["status"] = "provisioning"
+    await deployment_store.update(request_id, {
+        "vm_name": vm_name,
+        "status": "provisioning"
+    })
     
     try:
-        # Step 1: Create NSG with both SSH and HTTPS rules
-        nsg_name = f"{vm_name}-nsg"
-        logger.info(f"Creating Network Security Group: {nsg_name}")
-        nsg = deployer.create_network_security_group(nsg_name)
+        # Step 1: Get subnet ID, first so a misconfigured subnet fails before any resource is created
+        subnet_id = await run_blocking(deployer.get_subnet_id)
         
-        # Step 2: Get subnet ID
-        subnet_id = f"/subscriptions/{deployer.subscription_id}/resourceGroups/{deployer.resource_group}/providers/Microsoft.Network/virtualNetworks/{settings.VNET_NAME}/subnets/{settings.SUBNET_NAME}"
+        # Step 2: Create NSG with both SSH and HTTPS rules and, concurrently, the public IP
+        nsg_name = f"{vm_name}-nsg"
+        nic_name = f"{vm_name}-nic"
+        logger.info("Creating Network Security Group: %s", nsg_name)
+        nsg, pip = await asyncio.gather(
+            deployer.create_network_security_group(nsg_name),
+            deployer.create_public_ip(f"{nic_name}-ip")
+        )
         
         # Step 3: Create Network Interface
-        nic_name = f"{vm_name}-nic"
-        logger.info(f"Creating network interface: {nic_name}")
-        nic = deployer.create_network_interface(nic_name, subnet_id, nsg.id)
+        logger.info("Creating network interface: %s", nic_name)
+        nic = await deployer.create_network_interface(nic_name, subnet_id, nsg.id, pip.id)
         
         # Step 4: Create VM using environment settings
-        logger.info(f"Creating VM: {vm_name}")
-        vm = deployer.create_vm(vm_name, nic.id)
+        logger.info("Creating VM: %s", vm_name)
+        vm = await deployer.create_vm(vm_name, nic.id)
         
         # Update deployment status to indicate VM is provisioned but script is pending
-        deployment_store[request_id]["status"] = "vm_provisioned"
-        deployment_store[request_id]["details"] = {
-            "resource_group": deployer.resource_group,
-            "location": deployer.location,
-            "vm_size": settings.VM_SIZE
-        }
+        await deployment_store.update(request_id, {
+            "status": "vm_provisioned",
+            "details": {
+                "resource_group": deployer.resource_group,
+                "location": deployer.location,
+                "vm_size": settings.VM_SIZE
+            }
+        })
         
         # Step 5: Wait for VM to be fully ready
-        logger.info(f"Waiting for VM {vm_name} to be ready before running setup script...")
+        logger.info("Waiting for VM %s to be ready before running setup script...", vm_name)
         vm_ready = await deployer.wait_for_vm_ready(vm_name)
         if not vm_ready:
             raise Exception(f"VM {vm_name} failed to reach running state within timeout.")
 
         # Step 6: Run setup script on the VM
-        logger.info(f"Running setup script on VM: {vm_name}")
-        deployment_store[request_id]["status"] = "configuring"
-        script_success, sigstruct_data = deployer.run_setup_script_on_vm(vm_name)
+        logger.info("Running setup script on VM: %s", vm_name)
+        await deployment_store.update(request_id, {"status": "configuring"})
+        script_success, sigstruct_data = await deployer.run_setup_script_on_vm(vm_name)
         
-        # Step 7: Get public IP
-        public_ip = deployer.get_vm_public_ip(vm_name)
-        # TODO: Consider waiting for public IP allocation to avoid returning None.
+        # Step 7: Get public IP, known from step 2 since it is statically allocated
+        public_ip = pip.ip_address
         
         # Update deployment status
         if script_success:
@@ -168,19 +257,19 @@ async def deploy_vm_task(
             if sigstruct_data:
                 details["sigstruct"] = sigstruct_data
             
-            deployment_store[request_id].update({
+            await deployment_store.update(request_id, {
                 "status": "completed",
-                "completed_at": datetime.now(),
+                "completed_at": utcnow(),
                 "public_ip": public_ip,
                 "details": details
             })
-            logger.info(f"Successfully deployed and configured VM: {vm_name}")
+            logger.info("Successfully deployed and configured VM: %s", vm_name)
             if sigstruct_data:
-                logger.info(f"Sigstruct data: {sigstruct_data}")
+                logger.info("Sigstruct data: %s", sigstruct_data)
         else:
-            deployment_store[request_id].update({
+            await deployment_store.update(request_id, {
                 "status": "partial_success",
-                "completed_at": datetime.now(),
+                "completed_at": utcnow(),
                 "public_ip": public_ip,
                 "details": {
                     "resource_group": deployer.resource_group,
@@ -190,17 +279,28 @@ async def deploy_vm_task(
                 },
                 "error": "VM deployed successfully but setup script failed"
             })
-            logger.warning(f"VM {vm_name} deployed but setup script failed")
+            logger.warning("VM %s deployed but setup script failed", vm_name)
         
     except Exception as e:
-        logger.error(f"Deployment of {vm_name} failed: {str(e)}")
+        logger.error("Deployment of %s failed: %s", vm_name, e)
         # Update deployment status with error
-        deployment_store[request_id].update({
+        await deployment_store.update(request_id, {
             "status": "failed",
-            "completed_at": datetime.now(),
+            "completed_at": utcnow(),
             "error": str(e)
         })
 
+if settings.REDIS_URL:
+    @functools.lru_cache(maxsize=None)
+    def get_worker_deployer():
+        """Deployer shared by all jobs in a Dramatiq worker process"""
+        return AzureVMDeployer()
+
+    @dramatiq.actor(max_retries=0, time_limit=settings.DEPLOY_JOB_TIME_LIMIT_SECS * 1000)
+    def deploy_vm_job(request_id: str, vm_name: str):
+        """Dramatiq job that runs deploy_vm_task outside the API process"""
+        asyncio.run(deploy_vm_task(request_id, vm_name, get_worker_deployer()))
+
 # Routes
 @app.get("/", tags=["Status"])
 async def root():
@@ -228,28 +328,34 @@ async def create_deployment(
     All settings are loaded from environment variables.
     This is an asynchronous operation - check the status endpoint for results.
     """
-    # Generate a unique request ID
-    request_id = str(uuid.uuid4())[:8]
-    created_at = datetime.now()
+    # Generate a unique request ID, retrying on the rare collision
+    request_id = secrets.token_hex(4)
+    while await deployment_store.exists(request_id):
+        request_id = secrets.token_hex(4)
+    created_at = utcnow()
     name_prefix = name_prefix.replace(" ", "-")
     
     # Generate VM name with request ID for uniqueness
     vm_name = f"{name_prefix}-{request_id}"
     
     # Initialize deployment tracking
-    deployment_store[request_id] = {
+    await deployment_store.put(request_id, {
         "request_id": request_id,
         "vm_name": vm_name,
         "status": "pending",
         "created_at": created_at
-    }
+    })
     
-    # Start deployment in background
-    background_tasks.add_task(
-        deploy_vm_task,
-        request_id=request_id,
-        vm_name=vm_name
-    )
+    # Start deployment on a worker, or in background when no queue is configured
+    if settings.REDIS_URL:
+        deploy_vm_job.send(request_id, vm_name)
+    else:
+        background_tasks.add_task(
+            deploy_vm_task,
+            request_id=request_id,
+            vm_name=vm_name,
+            deployer=deployer
+        )
     
     return DeploymentResponse(
         request_id=request_id,
@@ -267,13 +373,14 @@ async def get_deployment_status(request_id: str):
     """
     Get the status of a deployment by request ID
     """
-    if request_id not in deployment_store:
+    deployment = await deployment_store.get(request_id)
+    if deployment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Deployment with ID {request_id} not found"
         )
     
-    return deployment_store[request_id]
+    return deployment
 
 @app.get(
     "/vms",
@@ -285,28 +392,32 @@ async def list_vms(deployer: AzureVMDeployer = Depends(get_deployer)):
     List all VMs in the resource group
     """
     try:
-        vms = deployer.list_vms()
+        # Page through the results in the thread pool, iterating the pager does network I/O
+        vms = await run_blocking(list, deployer.list_vms())
         # TODO: Paginate or filter results for large resource groups.
-        vm_list = []
-        
-        for vm in vms:
-            status = deployer.get_vm_status(vm.name)
-            public_ip = deployer.get_vm_public_ip(vm.name)
-            
-            vm_info = {
+        semaphore = asyncio.Semaphore(VM_LOOKUP_CONCURRENCY)
+
+        async def describe_vm(vm):
+            async with semaphore:
+                vm_status, public_ip = await asyncio.gather(
+                    run_blocking(deployer.get_vm_status, vm.name),
+                    run_blocking(deployer.get_vm_public_ip, vm.name)
+                )
+            return {
                 "name": vm.name,
-                "status": status,
+                "status": vm_status,
                 "size": vm.hardware_profile.vm_size,
                 "location": vm.location,
                 "os_type": vm.storage_profile.os_disk.os_type,
                 "public_ip": public_ip,
                 "tags": vm.tags
             }
-            vm_list.append(vm_info)
+
+        vm_list = await asyncio.gather(*(describe_vm(vm) for vm in vms))
             
         return {"vms": vm_list}
     except Exception as e:
-        logger.error(f"Failed to list VMs: {str(e)}")
+        logger.error("Failed to list VMs: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to list VMs: {str(e)}"
@@ -324,16 +435,17 @@ async def get_vm_details(
     Get detailed information about a specific VM
     """
     try:
-        # Get VM instance
-        vm = deployer.compute_client.virtual_machines.get(
-            deployer.resource_group,
-            vm_name
+        # Get the VM instance, status and IP concurrently, off the event loop
+        vm, vm_status, public_ip = await asyncio.gather(
+            run_blocking(
+                deployer.compute_client.virtual_machines.get,
+                deployer.resource_group,
+                vm_name
+            ),
+            run_blocking(deployer.get_vm_status, vm_name),
+            run_blocking(deployer.get_vm_public_ip, vm_name)
         )
         
-        # Get status and IP
-        vm_status = deployer.get_vm_status(vm_name)
-        public_ip = deployer.get_vm_public_ip(vm_name)
-        
         return {
             "name": vm.name,
             "id": vm.id,
@@ -352,14 +464,14 @@ async def get_vm_details(
     except Exception as e:
         # Check if it's a ResourceNotFound error (VM doesn't exist or was deleted)
         if "ResourceNotFound" in str(e):
-            logger.info(f"VM {vm_name} not found - it may have been deleted")
+            logger.info("VM %s not found - it may have been deleted", vm_name)
             raise HTTPException(
                 status_code=404,
                 detail=f"VM {vm_name} not found or has been deleted"
             )
         else:
             # For other errors, log the full exception and return a 500
-            logger.error(f"Failed to get VM details for {vm_name}: {str(e)}")
+            logger.error("Failed to get VM details for %s: %s", vm_name, e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error retrieving VM details: {str(e)}"
@@ -386,7 +498,8 @@ async def run_attestation(
     
     # Check if VM exists and get its IP
     try:
-        vm = deployer.compute_client.virtual_machines.get(
+        vm = await run_blocking(
+            deployer.compute_client.virtual_machines.get,
             deployer.resource_group,
             vm_name
         )
@@ -397,14 +510,14 @@ async def run_attestation(
                 detail=f"VM {vm_name} not found"
             )
         else:
-            logger.error(f"Error retrieving VM {vm_name}: {str(e)}")
+            logger.error("Error retrieving VM %s: %s", vm_name, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error retrieving VM details: {str(e)}"
             )
     
     # Get the public IP
-    public_ip = deployer.get_vm_public_ip(vm_name)
+    public_ip = await run_blocking(deployer.get_vm_public_ip, vm_name)
     if not public_ip:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -412,8 +525,7 @@ async def run_attestation(
         )
     
     # Run attestation
-    attestation_client = AttestationClient()
-    success, details = attestation_client.verify_attestation(
+    success, details = await attestation_client.verify_attestation(
         host=public_ip,
         port=request.port,
         mrenclave=request.mrenclave,
@@ -433,36 +545,15 @@ async def run_attestation(
         success = False
         details["error"] = "Attestation reported host does not match VM public IP"
     
-    # Verify the stdout output sequentially
+    # Verify the stdout output
     stdout = details.get("stdout", "")
-    # TODO: Consider a more robust attestation verification method than stdout parsing.
-    # Define the expected steps along with an error message for each if missing.
-    expected_steps = [
-        ("Seeding the random number generator... ok", "Error: Seeding the random number generator failed."),
-        (f"Connecting to tcp/{public_ip}/{request.port}... ok", f"Error: Connecting to tcp/{public_ip}/{request.port} failed."),
-        ("Setting up the SSL/TLS structure... ok", "Error: Setting up the SSL/TLS structure failed."),
-        ("Setting certificate verification mode for RA-TLS... ok", "Error: Setting certificate verification mode for RA-TLS failed."),
-        ("Installing RA-TLS callback ... ok", "Error: Installing RA-TLS callback failed."),
-        ("Performing the SSL/TLS handshake...", "Error: Performing the SSL/TLS handshake failed."),
-        ("Handshake completed... ok", "Error: Handshake did not complete successfully."),
-        ("Verifying peer X.509 certificate... ok", "Error: Peer X.509 certificate verification failed."),
-        ("GET /health HTTP/1.1", "Error: GET /health HTTP/1.1 request not found."),
-        (f"Host: {public_ip}:{request.port}", f"Error: Host header does not match expected value: Host: {public_ip}:{request.port}."),
-        ("HTTP/1.1 200 OK", "Error: HTTP/1.1 200 OK response not received."),
-        ("Server is running", "Error: Server is not running as expected.")
-    ]
-
-    # Check each expected step sequentially; if one fails, stop checking further.
-    current_index = 0
-    for expected, err_msg in expected_steps:
-        pos = stdout.find(expected, current_index)
-        if pos == -1:
-            success = False
-            details["error"] = err_msg
-            logger.error(err_msg)
-            break
-        # Move current index forward so subsequent steps are expected to appear later.
-        current_index = pos + len(expected)
+
+    # Check the expected steps in a single pass; report the first one missing.
+    err_msg = find_missing_attestation_step(stdout, public_ip, request.port)
+    if err_msg:
+        success = False
+        details["error"] = err_msg
+        logger.error(err_msg)
     
     
     return AttestationResponse(
@@ -500,11 +591,11 @@ async def run_attestation(
 #     # Delete in background task
 #     async def delete_vm_task():
 #         try:
-#             logger.info(f"Deleting VM: {vm_name}")
+#             logger.info("Deleting VM: %s", vm_name)
 #             deployer.delete_vm(vm_name)
-#             logger.info(f"Successfully deleted VM: {vm_name}")
+#             logger.info("Successfully deleted VM: %s", vm_name)
 #         except Exception as e:
-#             logger.error(f"Failed to delete VM {vm_name}: {str(e)}")
+#             logger.error("Failed to delete VM %s: %s", vm_name, e)
     
 #     background_tasks.add_task(delete_vm_task)
     
@@ -2,10 +2,10 @@
 # Copyright (C) 2026 Relational Network
 
 # attestation/attestation_client.py
+import asyncio
 import os
-import subprocess
 import logging
-import tempfile
+import random
 import time
 from typing import Dict, Optional, Tuple
 
@@ -14,18 +14,34 @@ logger = logging.getLogger(__name__)
 class AttestationClient:
     """Client for remote attestation of TEE instances"""
     
-    def __init__(self, attest_binary_path: str = "/usr/local/bin/attest"):
+    def __init__(self, attest_binary_path: str = "/usr/local/bin/attest", max_concurrency: int = 4):
         """
         Initialize the attestation client
         
         Args:
             attest_binary_path: Path to the attest binary
+            max_concurrency: Maximum number of attest processes running at once
         """
         self.attest_binary_path = attest_binary_path
-        if not os.path.exists(self.attest_binary_path):
-            logger.warning(f"Attest binary not found at {self.attest_binary_path}")
+        self.max_concurrency = max_concurrency
+        # Created on first use so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # The path is fixed for the lifetime of the client, so check it once
+        self._binary_ok = os.path.exists(self.attest_binary_path)
+        if not self._binary_ok:
+            logger.warning("Attest binary not found at %s", self.attest_binary_path)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @staticmethod
+    def _backoff_delay(retry_delay: int, attempt: int) -> float:
+        """Exponential backoff with jitter for the given attempt number"""
+        return retry_delay * 2 ** (attempt - 1) + random.uniform(0, 0.5)
             
-    def verify_attestation(
+    async def verify_attestation(
         self, 
         host: str, 
         port: int, 
@@ -49,14 +65,14 @@ class AttestationClient:
             isvsvn: The ISV SVN (default: 0)
             timeout: Timeout in seconds for the attestation process
             max_retries: Maximum number of retries on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds, doubled on each retry
             
         Returns:
             Tuple of (success, details)
             success: Boolean indicating if attestation was successful
             details: Dictionary with details or error message
         """
-        if not os.path.exists(self.attest_binary_path):
+        if not self._binary_ok:
             return False, {"error": f"Attest binary not found at {self.attest_binary_path}"}
         
         # Set environment variables for the attestation
@@ -74,73 +90,73 @@ class AttestationClient:
             isvsvn
         ]
         
-        logger.info(f"Running attestation for {host}:{port} with measurements: {mrenclave}, {mrsigner}")
+        logger.info("Running attestation for %s:%s with measurements: %s, %s", host, port, mrenclave, mrsigner)
         
         attempt = 0
         while attempt < max_retries:
             attempt += 1
             
             try:
-                with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+                # Limit how many attest processes run at once
+                async with self._get_semaphore():
                     # Run the attestation command
                     start_time = time.time()
-                    process = subprocess.Popen(
-                        cmd, 
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd, 
                         env=env,
-                        stdout=stdout_file,
-                        stderr=stderr_file,
-                        text=True
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
                     )
-                    
-                    # Wait for the process to complete with timeout
+                
+                    # Collect stdout and stderr, waiting for the process to complete with timeout
                     try:
-                        process.wait(timeout=timeout)
-                    except subprocess.TimeoutExpired:
+                        stdout_b, stderr_b = await asyncio.wait_for(process.communicate(), timeout=timeout)
+                    except asyncio.TimeoutError:
                         process.kill()
-                        logger.error(f"Attestation timed out after {timeout} seconds")
+                        await process.wait()
+                        logger.error("Attestation timed out after %s seconds", timeout)
                         return False, {"error": f"Attestation timed out after {timeout} seconds"}
+                
+                    stdout = stdout_b.decode('utf-8', errors='replace')
+                    stderr = stderr_b.decode('utf-8', errors='replace')
+                
+                duration = time.time() - start_time
+                
+                # Check if attestation was successful
+                if process.returncode == 0:
+                    logger.info("Attestation successful for %s:%s (completed in %.2fs)", host, port, duration)
+                    return True, {
+                        "success": True,
+                        "host": host,
+                        "port": port,
+                        "mrenclave": mrenclave,
+                        "mrsigner": mrsigner,
+                        "stdout": stdout,
+                        "duration_seconds": duration
+                    }
+                else:
+                    logger.warning("Attestation failed for %s:%s with exit code %s (attempt %s/%s)", host, port, process.returncode, attempt, max_retries)
                     
-                    # Get stdout and stderr
-                    stdout_file.seek(0)
-                    stderr_file.seek(0)
-                    stdout = stdout_file.read().decode('utf-8')
-                    stderr = stderr_file.read().decode('utf-8')
-                    
-                    duration = time.time() - start_time
-                    
-                    # Check if attestation was successful
-                    if process.returncode == 0:
-                        logger.info(f"Attestation successful for {host}:{port} (completed in {duration:.2f}s)")
-                        return True, {
-                            "success": True,
-                            "host": host,
-                            "port": port,
-                            "mrenclave": mrenclave,
-                            "mrsigner": mrsigner,
+                    if attempt >= max_retries:
+                        return False, {
+                            "success": False,
+                            "error": f"Attestation failed with exit code {process.returncode}",
                             "stdout": stdout,
-                            "duration_seconds": duration
+                            "stderr": stderr
                         }
-                    else:
-                        logger.warning(f"Attestation failed for {host}:{port} with exit code {process.returncode} (attempt {attempt}/{max_retries})")
-                        
-                        if attempt >= max_retries:
-                            return False, {
-                                "success": False,
-                                "error": f"Attestation failed with exit code {process.returncode}",
-                                "stdout": stdout,
-                                "stderr": stderr
-                            }
-                        
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        
+                    
+                    delay = self._backoff_delay(retry_delay, attempt)
+                    logger.info("Retrying in %.1f seconds...", delay)
+                    await asyncio.sleep(delay)
+                    
             except Exception as e:
-                logger.error(f"Error running attestation: {str(e)}")
+                logger.error("Error running attestation: %s", e)
                 if attempt >= max_retries:
                     return False, {"error": f"Error running attestation: {str(e)}"}
                 
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                delay = self._backoff_delay(retry_delay, attempt)
+                logger.info("Retrying in %.1f seconds...", delay)
+                await asyncio.sleep(delay)
                 
         # This should not be reached, but just in case
         return False, {"error": "Attestation failed after all retries"}
\ No newline at end of file
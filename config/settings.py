@@ -16,6 +16,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 AZURE_SUBSCRIPTION_ID = os.getenv('AZURE_SUBSCRIPTION_ID')
 AZURE_RESOURCE_GROUP = os.getenv('AZURE_RESOURCE_GROUP')
 AZURE_LOCATION = os.getenv('AZURE_LOCATION', 'westeurope')  # Default location
+AZURE_HTTP_POOL_SIZE = int(os.getenv('AZURE_HTTP_POOL_SIZE', '32'))  # Connections kept per host
+AZURE_HTTP_CONNECT_TIMEOUT_SECS = int(os.getenv('AZURE_HTTP_CONNECT_TIMEOUT_SECS', '10'))  # Timeout for opening a connection to Azure
+AZURE_HTTP_READ_TIMEOUT_SECS = int(os.getenv('AZURE_HTTP_READ_TIMEOUT_SECS', '60'))  # Timeout for reading an Azure response
+AZURE_LRO_POLL_SECS = int(os.getenv('AZURE_LRO_POLL_SECS', '5'))  # Polling interval for long-running operations
+PUBLIC_IP_CACHE_TTL_SECS = int(os.getenv('PUBLIC_IP_CACHE_TTL_SECS', '30'))  # How long VM public IPs are cached
 
 # VM Configuration
 VM_SIZE = 'Standard_DC1s_v3'  # Default size for confidential computing
@@ -39,5 +44,14 @@ SECURITY_TYPE = 'TrustedLaunch'
 SSH_PUBLIC_KEY = os.getenv('SSH_PUBLIC_KEY')
 ADMIN_USERNAME = 'azureuser'  # Default username
 
+# Job Queue Configuration
+# When set, deployments run on Dramatiq workers and their state is kept in Redis
+REDIS_URL = os.getenv('REDIS_URL')
+DEPLOYMENT_TTL_SECS = int(os.getenv('DEPLOYMENT_TTL_SECS', '604800'))  # Keep deployment state for 7 days
+DEPLOY_JOB_TIME_LIMIT_SECS = int(os.getenv('DEPLOY_JOB_TIME_LIMIT_SECS', '3600'))
+
+# Attestation Configuration
+ATTEST_MAX_CONCURRENCY = int(os.getenv('ATTEST_MAX_CONCURRENCY', '4'))  # Concurrent attest processes per worker
+
 # Logging Configuration
 LOGGING_LEVEL = os.getenv('LOGGING_LEVEL', 'INFO')  # Options: DEBUG, INFO, WARNING, ERROR
\ No newline at end of file
@@ -10,12 +10,15 @@ Run this script to start the FastAPI server with configurable options.
 import argparse
 import uvicorn
 import logging
+import os
 import sys
 from pathlib import Path
 
 # Ensure project root is in path
 sys.path.append(str(Path(__file__).resolve().parent))
 
+from config import settings
+
 def main():
     parser = argparse.ArgumentParser(description="Run Relational Azure DevOps Runner")
     parser.add_argument(
@@ -34,6 +37,13 @@ def main():
         action="store_true",
         help="Enable auto-reload (development only)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        # Deployment state is only shared between workers when it is kept in Redis
+        default=max(2, os.cpu_count() or 2) if settings.REDIS_URL else 1,
+        help="Number of worker processes (default: CPU count with REDIS_URL set, otherwise 1)"
+    )
     parser.add_argument(
         "--log-level", 
         default="info",
@@ -42,6 +52,12 @@ def main():
     )
     args = parser.parse_args()
 
+    if args.workers > 1 and not settings.REDIS_URL:
+        logging.warning(
+            "Running %d workers without REDIS_URL: deployment status is kept per worker "
+            "and may not be found by other workers", args.workers
+        )
+
     # Configure logging to suppress uvicorn access logs in higher log levels
     if args.log_level in ["critical", "error", "warning"]:
         logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -59,7 +75,10 @@ def main():
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=args.workers,
         log_level=args.log_level,
+        loop="uvloop",
+        http="httptools",
     )
 
 if __name__ == "__main__":
@@ -2,276 +2,635 @@
 # Copyright (C) 2026 Relational Network
 
 # scripts/azure_deployer.py
-import sys
+import argparse
+import asyncio
+import base64
+import functools
 import logging
-from pathlib import Path
-sys.path.append(str(Path(__file__).resolve().parent.parent))
-
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.compute import ComputeManagementClient
-from datetime import datetime
+import random
+import re
+import threading
+import time
 import uuid
-from typing import Optional, Dict, Any, List
-import asyncio
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+
+import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+# azure.identity and the management SDKs pull in hundreds of modules, so they are
+# imported where first used rather than when this module is loaded
+if TYPE_CHECKING:
+    from azure.core.pipeline.transport import RequestsTransport
+    from azure.identity import DefaultAzureCredential
 
 from config import settings
+from utils.concurrency import run_blocking
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Retries of resource creation after throttling or a server error
+CREATE_MAX_ATTEMPTS = 5
+CREATE_RETRY_MAX_DELAY = 30
+
+# Upper bound for reading back the sigstruct output from a configured VM
+SIGSTRUCT_READ_TIMEOUT_SECS = 300
+
+# Sigstruct values printed by the setup script between these markers
+_SIGSTRUCT_BLOCK_RE = re.compile(r"--- SIGSTRUCT_DATA_START ---(.*?)--- SIGSTRUCT_DATA_END ---", re.S)
+_SIGSTRUCT_FIELD_RE = re.compile(r"^[^\S\n]*(mr_signer|mr_enclave|isv_prod_id|isv_svn):[^\S\n]*(.*?)[^\S\n]*$", re.M)
+
+# Setup script run on new VMs through the custom script extension, which
+# expects it base64-encoded
+_SETUP_SCRIPT = '''#!/bin/bash
+    set -e
+
+    echo "Starting VM setup for SGX Docker container..."
+
+    # Update system
+    echo "Updating system packages..."
+    sudo apt-get update
+    sudo apt-get upgrade -y
+
+    # Install Docker
+    echo "Installing Docker..."
+    sudo apt-get install -y apt-transport-https ca-certificates curl software-properties-common
+    curl -fsSL https://download.docker.com/linux/ubuntu/gpg | sudo apt-key add -
+    sudo add-apt-repository "deb [arch=amd64] https://download.docker.com/linux/ubuntu $(lsb_release -cs) stable"
+    sudo apt-get update
+    sudo apt-get install -y docker-ce
+
+    # Pull Docker image
+    echo "Pulling Docker image..."
+    sudo docker pull binglekruger/ntls-ntc:v2
+
+    # Verify image installation
+    echo "Verifying Docker image installation..."
+    sudo docker images
+
+    # Run a temporary container to execute the command and save output
+    echo "Running temporary container to get sigstruct data..."
+    TEMP_CONTAINER_ID=$(sudo docker run -d --name temp-container \\
+        --device=/dev/sgx_enclave \\
+        --device=/dev/sgx_provision \\
+        binglekruger/ntls-ntc:v2)
+
+    # Wait for container to initialize
+    echo "Waiting for container to initialize..."
+    sleep 5
+
+    # Execute command in Docker container and save output (without -it flags)
+    echo "Executing sgx-sigstruct-view command in container..."
+    # The output is also kept on disk so it can be read back with a run command
+    {
+        echo "--- SIGSTRUCT_DATA_START ---"
+        sudo docker exec $TEMP_CONTAINER_ID /bin/bash -c "gramine-sgx-sigstruct-view sgx-mvp.sig"
+        echo "--- SIGSTRUCT_DATA_END ---"
+    } | sudo tee /var/log/sigstruct.out
+    # Piping through tee hides a failed docker exec from set -e
+    if [ "${PIPESTATUS[0]}" -ne 0 ]; then
+        echo "Failed to read sigstruct data"
+        exit 1
+    fi
+
+    # Stop and remove the temporary container
+    echo "Stopping and removing temporary container..."
+    sudo docker stop $TEMP_CONTAINER_ID
+    sudo docker rm $TEMP_CONTAINER_ID
+
+    # Remove any existing container with the same name
+    echo "Checking for existing containers with the same name..."
+    if sudo docker ps -a | grep -q ntls-server; then
+        echo "Removing existing ntls-server container..."
+        sudo docker rm -f ntls-server
+    fi
+
+    # Run the final container with the HTTPS port (443)
+    echo "Running final Docker container on HTTPS port..."
+    sudo docker run -d -p 443:8081 \\
+        --restart=unless-stopped \\
+        --name ntls-server \\
+        --device=/dev/sgx_enclave \\
+        --device=/dev/sgx_provision \\
+        binglekruger/ntls-ntc:v2
+
+    # Check if container is running
+    echo "Checking container status..."
+    if sudo docker ps | grep -q ntls-server; then
+        echo "Container 'ntls-server' is running successfully!"
+        echo "The HTTPS server is now accessible at https://$(hostname -I | awk '{print $1}')/health"
+    else
+        echo "WARNING: Container appears to have stopped. Checking logs for errors..."
+        sudo docker logs ntls-server
+    fi
+
+    echo "Setup completed successfully!"
+    '''
+_SETUP_SCRIPT_B64 = base64.b64encode(_SETUP_SCRIPT.encode()).decode()
+
+@functools.lru_cache(maxsize=None)
+def _read_sigstruct_command():
+    """Run command that reads back the sigstruct output saved by the setup script"""
+    from azure.mgmt.compute.models import RunCommandInput
+    return RunCommandInput(
+        command_id="RunShellScript",
+        script=["cat /var/log/sigstruct.out"]
+    )
+
+@functools.lru_cache(maxsize=None)
+def _nsg_rules():
+    """Inbound rules applied to every VM's NSG: SSH and HTTPS from anywhere"""
+    from azure.mgmt.network.models import SecurityRule
+    return [
+        SecurityRule(
+            name="AllowSSH",
+            priority=100,
+            direction="Inbound",
+            access="Allow",
+            protocol="Tcp",
+            source_port_range="*",
+            destination_port_range="22",
+            source_address_prefix="*",
+            destination_address_prefix="*"
+        ),
+        SecurityRule(
+            name="AllowAnyHTTPSInbound",
+            priority=110,
+            direction="Inbound",
+            access="Allow",
+            protocol="Tcp",
+            source_port_range="*",
+            destination_port_range="443",
+            source_address_prefix="*",
+            destination_address_prefix="*"
+        )
+    ]
+
+# Subnet new NICs are attached to, checked to exist on first use
+SUBNET_ID = f"/subscriptions/{settings.AZURE_SUBSCRIPTION_ID}/resourceGroups/{settings.AZURE_RESOURCE_GROUP}/providers/Microsoft.Network/virtualNetworks/{settings.VNET_NAME}/subnets/{settings.SUBNET_NAME}"
+_SUBNET_VALIDATED = False
+
+# Credential, HTTP transport and management clients shared by every deployer in
+# the process, so pipelines, tokens and pooled connections are reused
+_CREDENTIAL: Optional["DefaultAzureCredential"] = None
+_SESSION: Optional[requests.Session] = None
+_TRANSPORT: Optional["RequestsTransport"] = None
+_CLIENT_CACHE: Dict[Tuple[str, str], Any] = {}
+_CLIENT_LOCK = threading.RLock()
+
+def _get_credential():
+    global _CREDENTIAL
+    with _CLIENT_LOCK:
+        if _CREDENTIAL is None:
+            from azure.identity import DefaultAzureCredential
+            _CREDENTIAL = DefaultAzureCredential()
+        return _CREDENTIAL
+
+def _get_transport():
+    global _SESSION, _TRANSPORT
+    with _CLIENT_LOCK:
+        if _TRANSPORT is None:
+            from azure.core.pipeline.transport import RequestsTransport
+            # One connection pool for all clients so TLS sessions are reused
+            _SESSION = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.AZURE_HTTP_POOL_SIZE,
+                pool_maxsize=settings.AZURE_HTTP_POOL_SIZE
+            )
+            _SESSION.mount("https://", adapter)
+            _TRANSPORT = RequestsTransport(
+                session=_SESSION,
+                session_owner=False,
+                connection_timeout=settings.AZURE_HTTP_CONNECT_TIMEOUT_SECS,
+                read_timeout=settings.AZURE_HTTP_READ_TIMEOUT_SECS
+            )
+        return _TRANSPORT
+
+def _cap_retry_after(response):
+    """
+    Cap the Retry-After header of successful responses at AZURE_LRO_POLL_SECS.
+    LRO pollers honour Retry-After over polling_interval, and the service often
+    suggests waits far longer than fast operations like NSG/NIC creation take.
+    Throttling and error responses are left untouched.
+    """
+    http_response = response.http_response
+    if not 200 <= http_response.status_code < 300:
+        return
+    retry_after = http_response.headers.get("Retry-After")
+    if retry_after is None:
+        return
+    try:
+        delay = float(retry_after)
+    except ValueError:
+        return
+    if delay > settings.AZURE_LRO_POLL_SECS:
+        http_response.headers["Retry-After"] = str(settings.AZURE_LRO_POLL_SECS)
+
+def _get_client(client_cls, subscription_id):
+    """Return the shared management client of the given type for a subscription"""
+    key = (client_cls.__name__, subscription_id)
+    with _CLIENT_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = client_cls(
+                _get_credential(),
+                subscription_id,
+                transport=_get_transport(),
+                raw_response_hook=_cap_retry_after
+            )
+            _CLIENT_CACHE[key] = client
+        return client
+
+def close_shared_clients():
+    """Close the shared management clients, HTTP session and credential"""
+    global _CREDENTIAL, _SESSION, _TRANSPORT
+    with _CLIENT_LOCK:
+        for client in _CLIENT_CACHE.values():
+            client.close()
+        _CLIENT_CACHE.clear()
+        if _SESSION is not None:
+            _SESSION.close()
+        if _CREDENTIAL is not None:
+            _CREDENTIAL.close()
+        _CREDENTIAL = None
+        _SESSION = None
+        _TRANSPORT = None
+
+async def wait_for_poller(poller, check_interval: float = 1.0):
+    """
+    Await an LRO poller without tying up a thread pool worker.
+    The sync poller already polls Azure on its own background thread,
+    so only its completion is checked here.
+    """
+    while not poller.done():
+        await asyncio.sleep(check_interval)
+    return poller.result()
+
+def _retry_delay(error, attempt):
+    """
+    Seconds to wait before retrying after error: the server's Retry-After when it
+    sends one, otherwise exponential backoff with jitter. Capped at CREATE_RETRY_MAX_DELAY.
+    """
+    response = error.response
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = 2 ** (attempt - 1) + random.uniform(0, 1)
+    return min(delay, CREATE_RETRY_MAX_DELAY)
+
+async def create_or_update_with_retry(begin, *args, **kwargs):
+    """
+    Start a create_or_update LRO and await its result, restarting the operation
+    when it ends in throttling (429) or a server error.
+
+    The SDK's RetryPolicy already retries the individual HTTP requests, including
+    the initial PUT, so only failures reported by the poller are retried here.
+    Resource names are deterministic, so restarting the operation is idempotent.
+    """
+    attempt = 1
+    while True:
+        poller = await run_blocking(begin, *args, **kwargs)
+        try:
+            return await wait_for_poller(poller)
+        except HttpResponseError as e:
+            transient = e.status_code == 429 or (e.status_code or 0) >= 500
+            if not transient or attempt >= CREATE_MAX_ATTEMPTS:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning("%s failed with status %s, retrying in %.1f seconds (attempt %s/%s)",
+                           getattr(begin, "__qualname__", begin), e.status_code, delay, attempt, CREATE_MAX_ATTEMPTS)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+def _status_map(instance_view):
+    """Index the statuses of a VM instance view by kind, such as PowerState or ProvisioningState"""
+    return {status.code.split('/', 1)[0]: status for status in instance_view.statuses or []}
+
 class AzureVMDeployer:
     def __init__(self):
-        self.credential = DefaultAzureCredential()
+        self.credential = _get_credential()
         self.subscription_id = settings.AZURE_SUBSCRIPTION_ID
         self.resource_group = settings.AZURE_RESOURCE_GROUP
         self.location = settings.AZURE_LOCATION
-        
+
         # Initialize clients
-        self.resource_client = ResourceManagementClient(
-            self.credential, self.subscription_id)
-        self.network_client = NetworkManagementClient(
-            self.credential, self.subscription_id)
-        self.compute_client = ComputeManagementClient(
-            self.credential, self.subscription_id)
+        from azure.mgmt.compute import ComputeManagementClient
+        from azure.mgmt.network import NetworkManagementClient
+        from azure.mgmt.resource import ResourceManagementClient
+        self.resource_client = _get_client(ResourceManagementClient, self.subscription_id)
+        self.network_client = _get_client(NetworkManagementClient, self.subscription_id)
+        self.compute_client = _get_client(ComputeManagementClient, self.subscription_id)
+
+        # Short-lived cache of public IPs by VM name, shared by the threads running SDK calls
+        self._ip_cache = TTLCache(maxsize=1024, ttl=settings.PUBLIC_IP_CACHE_TTL_SECS)
+        self._ip_cache_lock = threading.Lock()
+
+        # Custom script extension parameters, identical for every VM in this location
+        self._ext_template = {
+            'location': self.location,
+            'publisher': 'Microsoft.Azure.Extensions',
+            'type': 'CustomScript',
+            'type_handler_version': '2.1',
+            'auto_upgrade_minor_version': True,
+            'settings': {
+                'script': _SETUP_SCRIPT_B64
+            },
+            'protected_settings': {}
+        }
         
-        logger.info(f"Initialized AzureVMDeployer with resource group: {self.resource_group}")
+        logger.info("Initialized AzureVMDeployer with resource group: %s", self.resource_group)
+
+    def get_subnet_id(self):
+        """
+        Return the ID of the configured subnet. The first call checks that it
+        exists, so a wrong VNet or subnet name fails before any resource is created.
+        """
+        global _SUBNET_VALIDATED
+        if not _SUBNET_VALIDATED:
+            # Raises ResourceNotFoundError if the subnet does not exist
+            self.network_client.subnets.get(
+                self.resource_group,
+                settings.VNET_NAME,
+                settings.SUBNET_NAME
+            )
+            _SUBNET_VALIDATED = True
+        return SUBNET_ID
 
     def generate_unique_name(self, base_name="relational-dev"):
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        return f"{base_name}-{timestamp}-{unique_id}"
+        return f"{base_name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
 
-    def create_network_security_group(self, nsg_name):
+    async def create_network_security_group(self, nsg_name):
         """
         Create and configure a Network Security Group (NSG) with SSH and HTTPS rules.
         """
-        logger.info(f"Creating Network Security Group: {nsg_name}")
+        logger.info("Creating Network Security Group: %s", nsg_name)
         try:
-            # Define NSG parameters
-            nsg_params = {
-                "location": self.location,
-                "security_rules": [
-                    {
-                        "name": "AllowSSH",
-                        "priority": 100,
-                        "direction": "Inbound",
-                        "access": "Allow",
-                        "protocol": "Tcp",
-                        "source_port_range": "*",
-                        "destination_port_range": "22",
-                        "source_address_prefix": "*",
-                        "destination_address_prefix": "*"
-                    },
-                    {
-                        "name": "AllowAnyHTTPSInbound",
-                        "priority": 110,
-                        "direction": "Inbound",
-                        "access": "Allow",
-                        "protocol": "Tcp",
-                        "source_port_range": "*",
-                        "destination_port_range": "443",
-                        "source_address_prefix": "*",
-                        "destination_address_prefix": "*"
-                    }
-                ]
-            }
+            from azure.mgmt.network.models import NetworkSecurityGroup
+            nsg_params = NetworkSecurityGroup(
+                location=self.location,
+                security_rules=_nsg_rules()
+            )
 
             # Create or update the NSG
-            poller = self.network_client.network_security_groups.begin_create_or_update(
+            nsg = await create_or_update_with_retry(
+                self.network_client.network_security_groups.begin_create_or_update,
                 self.resource_group,
                 nsg_name,
-                nsg_params
+                nsg_params,
+                polling_interval=settings.AZURE_LRO_POLL_SECS
             )
-            nsg = poller.result()
-            logger.info(f"Successfully created NSG: {nsg_name}")
+            logger.info("Successfully created NSG: %s", nsg_name)
             return nsg
         except Exception as e:
-            logger.error(f"Failed to create Network Security Group: {str(e)}")
+            logger.error("Failed to create Network Security Group: %s", e)
             raise
 
-    def create_network_interface(self, name, subnet_id, nsg_id=None):
-        logger.info(f"Creating network interface: {name}")
+    async def create_public_ip(self, public_ip_name):
+        """
+        Create a static Standard SKU IPv4 public IP address.
+        """
+        logger.info("Creating public IP: %s", public_ip_name)
         try:
-            # Create public IP address first
-            public_ip_name = f"{name}-ip"
-            logger.info(f"Creating public IP: {public_ip_name}")
-            public_ip_parameters = {
-                'location': self.location,
-                'sku': {
-                    'name': 'Standard'
-                },
-                'public_ip_allocation_method': 'Static',
-                'public_ip_address_version': 'IPv4'
-            }
+            from azure.mgmt.network.models import PublicIPAddress, PublicIPAddressSku
+            public_ip_parameters = PublicIPAddress(
+                location=self.location,
+                sku=PublicIPAddressSku(name='Standard'),
+                public_ip_allocation_method='Static',
+                public_ip_address_version='IPv4'
+            )
             
-            poller = self.network_client.public_ip_addresses.begin_create_or_update(
+            return await create_or_update_with_retry(
+                self.network_client.public_ip_addresses.begin_create_or_update,
                 self.resource_group,
                 public_ip_name,
-                public_ip_parameters
+                public_ip_parameters,
+                polling_interval=settings.AZURE_LRO_POLL_SECS
+            )
+        except Exception as e:
+            logger.error("Failed to create public IP: %s", e)
+            raise
+
+    async def create_network_interface(self, name, subnet_id, nsg_id, public_ip_id):
+        """
+        Create a NIC attached to the subnet, the NSG (skipped when nsg_id is None)
+        and an existing public IP, created beforehand with create_public_ip.
+        """
+        logger.info("Creating network interface: %s", name)
+        try:
+            from azure.mgmt.network.models import (
+                NetworkInterface,
+                NetworkInterfaceIPConfiguration,
+                NetworkSecurityGroup,
+                PublicIPAddress,
+                Subnet
             )
-            public_ip = poller.result()
 
             # Create NIC with the public IP and NSG
-            nic_params = {
-                'location': self.location,
-                'ip_configurations': [{
-                    'name': f'{name}-ipconfig',
-                    'subnet': {
-                        'id': subnet_id
-                    },
-                    'public_ip_address': {
-                        'id': public_ip.id
-                    }
-                }]
-            }
-            
-            # Add NSG if provided
-            if nsg_id:
-                nic_params['network_security_group'] = {
-                    'id': nsg_id
-                }
+            nic_params = NetworkInterface(
+                location=self.location,
+                ip_configurations=[
+                    NetworkInterfaceIPConfiguration(
+                        name=f'{name}-ipconfig',
+                        subnet=Subnet(id=subnet_id),
+                        public_ip_address=PublicIPAddress(id=public_ip_id)
+                    )
+                ],
+                # Add NSG if provided
+                network_security_group=NetworkSecurityGroup(id=nsg_id) if nsg_id else None
+            )
             
-            poller = self.network_client.network_interfaces.begin_create_or_update(
+            return await create_or_update_with_retry(
+                self.network_client.network_interfaces.begin_create_or_update,
                 self.resource_group,
                 name,
-                nic_params
+                nic_params,
+                polling_interval=settings.AZURE_LRO_POLL_SECS
             )
-            return poller.result()
         except Exception as e:
-            logger.error(f"Failed to create network interface: {str(e)}")
+            logger.error("Failed to create network interface: %s", e)
             raise
 
-    def create_vm(self, vm_name, nic_id, vm_size=None, location=None, tags=None):
-        logger.info(f"Creating VM: {vm_name}")
+    async def create_vm(self, vm_name, nic_id, vm_size=None, location=None, tags=None):
+        logger.info("Creating VM: %s", vm_name)
+        self.invalidate_public_ip(vm_name)
         try:
             # Use provided values or defaults from settings
             actual_location = location or self.location
             actual_vm_size = vm_size or settings.VM_SIZE
             actual_tags = tags or {}
+
+            from azure.mgmt.compute.models import (
+                HardwareProfile,
+                ImageReference,
+                LinuxConfiguration,
+                ManagedDiskParameters,
+                NetworkInterfaceReference,
+                NetworkProfile,
+                OSDisk,
+                OSProfile,
+                SecurityProfile,
+                SshConfiguration,
+                SshPublicKey,
+                StorageProfile,
+                UefiSettings,
+                VirtualMachine
+            )
             
-            vm_parameters = {
-                'location': actual_location,
-                'tags': actual_tags,
-                'properties': {
-                    'hardwareProfile': {
-                        'vmSize': actual_vm_size
-                    },
-                    'storageProfile': {
-                        'imageReference': settings.VM_IMAGE,
-                        'osDisk': {
-                            'createOption': 'FromImage',
-                            'managedDisk': {
-                                'storageAccountType': 'StandardSSD_LRS'
-                            }
-                        }
-                    },
-                    'networkProfile': {
-                        'networkInterfaces': [{
-                            'id': nic_id,
-                            'properties': {
-                                'deleteOption': 'Delete'
-                            }
-                        }]
-                    },
-                    'osProfile': {
-                        'computerName': vm_name,
-                        'adminUsername': settings.ADMIN_USERNAME,
-                        'linuxConfiguration': {
-                            'disablePasswordAuthentication': True,
-                            'ssh': {
-                                'publicKeys': [{
-                                    'path': f'/home/{settings.ADMIN_USERNAME}/.ssh/authorized_keys',
-                                    'keyData': settings.SSH_PUBLIC_KEY
-                                }]
-                            }
-                        }
-                    },
-                    'securityProfile': {
-                        'uefiSettings': {
-                            'secureBootEnabled': settings.ENABLE_SECURE_BOOT,
-                            'vTpmEnabled': settings.ENABLE_VTPM
-                        },
-                        'securityType': settings.SECURITY_TYPE
-                    }
-                }
-            }
-
-            poller = self.compute_client.virtual_machines.begin_create_or_update(
+            vm_parameters = VirtualMachine(
+                location=actual_location,
+                tags=actual_tags,
+                hardware_profile=HardwareProfile(vm_size=actual_vm_size),
+                storage_profile=StorageProfile(
+                    image_reference=ImageReference(**settings.VM_IMAGE),
+                    os_disk=OSDisk(
+                        create_option='FromImage',
+                        managed_disk=ManagedDiskParameters(storage_account_type='StandardSSD_LRS')
+                    )
+                ),
+                network_profile=NetworkProfile(
+                    network_interfaces=[
+                        NetworkInterfaceReference(id=nic_id, delete_option='Delete')
+                    ]
+                ),
+                os_profile=OSProfile(
+                    computer_name=vm_name,
+                    admin_username=settings.ADMIN_USERNAME,
+                    linux_configuration=LinuxConfiguration(
+                        disable_password_authentication=True,
+                        ssh=SshConfiguration(
+                            public_keys=[
+                                SshPublicKey(
+                                    path=f'/home/{settings.ADMIN_USERNAME}/.ssh/authorized_keys',
+                                    key_data=settings.SSH_PUBLIC_KEY
+                                )
+                            ]
+                        )
+                    )
+                ),
+                security_profile=SecurityProfile(
+                    uefi_settings=UefiSettings(
+                        secure_boot_enabled=settings.ENABLE_SECURE_BOOT,
+                        v_tpm_enabled=settings.ENABLE_VTPM
+                    ),
+                    security_type=settings.SECURITY_TYPE
+                )
+            )
+
+            return await create_or_update_with_retry(
+                self.compute_client.virtual_machines.begin_create_or_update,
                 self.resource_group,
                 vm_name,
-                vm_parameters
+                vm_parameters,
+                polling_interval=settings.AZURE_LRO_POLL_SECS
             )
-            return poller.result()
         except Exception as e:
-            logger.error(f"Failed to create VM: {str(e)}")
+            logger.error("Failed to create VM: %s", e)
             raise
 
     def list_vms(self):
-        """List all VMs in the resource group"""
-        try:
-            logger.info(f"Listing VMs in resource group: {self.resource_group}")
-            vms = self.compute_client.virtual_machines.list(self.resource_group)
-            return list(vms)  # Convert generator to list
-        except Exception as e:
-            logger.error(f"Failed to list VMs: {str(e)}")
-            raise
+        """
+        List all VMs in the resource group.
+        Returns a lazy pager; pages are fetched from Azure while it is iterated,
+        so request errors are raised to the caller during iteration.
+        """
+        logger.info("Listing VMs in resource group: %s", self.resource_group)
+        return self.compute_client.virtual_machines.list(self.resource_group)
+
+    def list_vm_names(self):
+        """Yield the names of the VMs in the resource group, page by page"""
+        for vm in self.list_vms():
+            yield vm.name
 
     def get_vm_status(self, vm_name):
         """Get the status of a specific VM"""
         try:
-            logger.info(f"Getting status for VM: {vm_name}")
+            logger.info("Getting status for VM: %s", vm_name)
             instance_view = self.compute_client.virtual_machines.instance_view(
                 self.resource_group,
                 vm_name
             )
-            if instance_view.statuses:
-                # Usually the last status is the most relevant
-                return instance_view.statuses[-1].display_status
-            return "Unknown"
+            # The power state is the status callers care about, wherever it is in the list
+            power_state = _status_map(instance_view).get("PowerState")
+            return power_state.display_status if power_state else "Unknown"
         except Exception as e:
-            logger.error(f"Failed to get VM status: {str(e)}")
+            logger.error("Failed to get VM status: %s", e)
             raise
 
     def get_vm_public_ip(self, vm_name):
-        """Get the public IP address of a VM"""
+        """Get the public IP address of a VM, served from a short-lived cache when possible"""
+        with self._ip_cache_lock:
+            cached_ip = self._ip_cache.get(vm_name)
+        if cached_ip is not None:
+            return cached_ip
+
         try:
-            logger.info(f"Getting public IP for VM: {vm_name}")
-            vm = self.compute_client.virtual_machines.get(
-                self.resource_group,
-                vm_name
-            )
-            nic_id = vm.network_profile.network_interfaces[0].id
-            nic_name = nic_id.split('/')[-1]
-            
-            nic = self.network_client.network_interfaces.get(
-                self.resource_group,
-                nic_name
-            )
-            
-            if nic.ip_configurations[0].public_ip_address:
-                public_ip_id = nic.ip_configurations[0].public_ip_address.id
-                public_ip_name = public_ip_id.split('/')[-1]
+            logger.info("Getting public IP for VM: %s", vm_name)
+            try:
+                # VMs created by this deployer name their IP "<vm>-nic-ip", which resolves in one call
                 public_ip = self.network_client.public_ip_addresses.get(
                     self.resource_group,
-                    public_ip_name
+                    f"{vm_name}-nic-ip"
                 )
-                return public_ip.ip_address
-            return None
+            except ResourceNotFoundError:
+                public_ip = None
+            # The IP outlives its VM, so only trust it while it is attached to this VM's NIC
+            if public_ip is None or not self._is_attached_to_vm_nic(public_ip, vm_name):
+                public_ip = self._find_public_ip(vm_name)
+
+            ip_address = public_ip.ip_address if public_ip else None
+            # Only cache allocated addresses so a pending IP is picked up as soon as it exists
+            if ip_address:
+                with self._ip_cache_lock:
+                    self._ip_cache[vm_name] = ip_address
+            return ip_address
         except Exception as e:
-            logger.error(f"Failed to get VM public IP: {str(e)}")
+            logger.error("Failed to get VM public IP: %s", e)
             raise
 
+    @staticmethod
+    def _is_attached_to_vm_nic(public_ip, vm_name):
+        """Whether a public IP is bound to the "<vm>-nic" NIC this deployer creates"""
+        ip_configuration = public_ip.ip_configuration
+        if ip_configuration is None or not ip_configuration.id:
+            return False
+        # Resource IDs are case-insensitive
+        return f"/networkinterfaces/{vm_name}-nic/".lower() in ip_configuration.id.lower()
+
+    def _find_public_ip(self, vm_name):
+        """Resolve the public IP resource of a VM through its NIC"""
+        vm = self.compute_client.virtual_machines.get(
+            self.resource_group,
+            vm_name
+        )
+        nic_id = vm.network_profile.network_interfaces[0].id
+        nic_name = nic_id.split('/')[-1]
+        
+        nic = self.network_client.network_interfaces.get(
+            self.resource_group,
+            nic_name
+        )
+        
+        if nic.ip_configurations[0].public_ip_address:
+            public_ip_id = nic.ip_configurations[0].public_ip_address.id
+            public_ip_name = public_ip_id.split('/')[-1]
+            return self.network_client.public_ip_addresses.get(
+                self.resource_group,
+                public_ip_name
+            )
+        return None
+
+    def invalidate_public_ip(self, vm_name):
+        """Drop the cached public IP of a VM"""
+        with self._ip_cache_lock:
+            self._ip_cache.pop(vm_name, None)
+
     # Disable this method for now
     # def delete_vm(self, vm_name):
     #     """Delete a VM and its associated resources, including disks."""
     #     try:
-    #         logger.info(f"Deleting VM: {vm_name}")
+    #         logger.info("Deleting VM: %s", vm_name)
 
     #         # Attempt to get VM details
     #         try:
@@ -280,12 +639,12 @@ class AzureVMDeployer:
     #                 vm_name
     #             )
     #         except Exception as e:
-    #             logger.warning(f"VM {vm_name} not found: {str(e)}")
+    #             logger.warning("VM %s not found: %s", vm_name, e)
     #             vm = None
 
     #         # Delete the VM
     #         if vm:
-    #             logger.info(f"Deleting virtual machine: {vm_name}")
+    #             logger.info("Deleting virtual machine: %s", vm_name)
     #             poller = self.compute_client.virtual_machines.begin_delete(
     #                 self.resource_group,
     #                 vm_name
@@ -300,7 +659,7 @@ class AzureVMDeployer:
 
     #                 # Attempt to delete NIC
     #                 try:
-    #                     logger.info(f"Deleting network interface: {nic_name}")
+    #                     logger.info("Deleting network interface: %s", nic_name)
     #                     nic = self.network_client.network_interfaces.get(
     #                         self.resource_group,
     #                         nic_name
@@ -310,308 +669,276 @@ class AzureVMDeployer:
     #                     if nic.ip_configurations[0].public_ip_address:
     #                         public_ip_id = nic.ip_configurations[0].public_ip_address.id
     #                         public_ip_name = public_ip_id.split('/')[-1]
-    #                         logger.info(f"Deleting public IP: {public_ip_name}")
+    #                         logger.info("Deleting public IP: %s", public_ip_name)
     #                         self.network_client.public_ip_addresses.begin_delete(
     #                             self.resource_group,
     #                             public_ip_name
     #                         ).result()
-    #                         logger.info(f"Deleted public IP: {public_ip_name}")
+    #                         logger.info("Deleted public IP: %s", public_ip_name)
 
     #                     # Delete NIC
     #                     self.network_client.network_interfaces.begin_delete(
     #                         self.resource_group,
     #                         nic_name
     #                     ).result()
-    #                     logger.info(f"Deleted network interface: {nic_name}")
+    #                     logger.info("Deleted network interface: %s", nic_name)
     #                 except Exception as e:
-    #                     logger.warning(f"Network interface {nic_name} not found or already deleted: {str(e)}")
+    #                     logger.warning("Network interface %s not found or already deleted: %s", nic_name, e)
 
     #         # Delete OS Disk and Data Disks
     #         if vm and vm.storage_profile.os_disk:
     #             os_disk_name = vm.storage_profile.os_disk.name
     #             try:
-    #                 logger.info(f"Deleting OS disk: {os_disk_name}")
+    #                 logger.info("Deleting OS disk: %s", os_disk_name)
     #                 self.compute_client.disks.begin_delete(
     #                     self.resource_group,
     #                     os_disk_name
     #                 ).result()
-    #                 logger.info(f"Deleted OS disk: {os_disk_name}")
+    #                 logger.info("Deleted OS disk: %s", os_disk_name)
     #             except Exception as e:
-    #                 logger.warning(f"OS disk {os_disk_name} not found or already deleted: {str(e)}")
+    #                 logger.warning("OS disk %s not found or already deleted: %s", os_disk_name, e)
 
     #         if vm and vm.storage_profile.data_disks:
     #             for data_disk in vm.storage_profile.data_disks:
     #                 data_disk_name = data_disk.name
     #                 try:
-    #                     logger.info(f"Deleting data disk: {data_disk_name}")
+    #                     logger.info("Deleting data disk: %s", data_disk_name)
     #                     self.compute_client.disks.begin_delete(
     #                         self.resource_group,
     #                         data_disk_name
     #                     ).result()
-    #                     logger.info(f"Deleted data disk: {data_disk_name}")
+    #                     logger.info("Deleted data disk: %s", data_disk_name)
     #                 except Exception as e:
-    #                     logger.warning(f"Data disk {data_disk_name} not found or already deleted: {str(e)}")
+    #                     logger.warning("Data disk %s not found or already deleted: %s", data_disk_name, e)
 
-    #         logger.info(f"Successfully deleted VM and associated resources: {vm_name}")
+    #         logger.info("Successfully deleted VM and associated resources: %s", vm_name)
     #     except Exception as e:
-    #         logger.error(f"Failed to delete VM: {str(e)}")
+    #         logger.error("Failed to delete VM: %s", e)
     #         raise
 
-    def run_setup_script_on_vm(self, vm_name):
+    async def run_setup_script_on_vm(self, vm_name):
         """
         Run the setup script on a VM using the custom script extension.
         Returns the sigstruct data if successful.
         """
-        logger.info(f"Running setup script on VM: {vm_name}")
+        logger.info("Running setup script on VM: %s", vm_name)
         try:
-            # First, create the bash script as a multiline string
-            script_content = '''#!/bin/bash
-    set -e
-
-    echo "Starting VM setup for SGX Docker container..."
-
-    # Update system
-    echo "Updating system packages..."
-    sudo apt-get update
-    sudo apt-get upgrade -y
-
-    # Install Docker
-    echo "Installing Docker..."
-    sudo apt-get install -y apt-transport-https ca-certificates curl software-properties-common
-    curl -fsSL https://download.docker.com/linux/ubuntu/gpg | sudo apt-key add -
-    sudo add-apt-repository "deb [arch=amd64] https://download.docker.com/linux/ubuntu $(lsb_release -cs) stable"
-    sudo apt-get update
-    sudo apt-get install -y docker-ce
-
-    # Pull Docker image
-    echo "Pulling Docker image..."
-    sudo docker pull binglekruger/ntls-ntc:v2
-
-    # Verify image installation
-    echo "Verifying Docker image installation..."
-    sudo docker images
-
-    # Run a temporary container to execute the command and save output
-    echo "Running temporary container to get sigstruct data..."
-    TEMP_CONTAINER_ID=$(sudo docker run -d --name temp-container \\
-        --device=/dev/sgx_enclave \\
-        --device=/dev/sgx_provision \\
-        binglekruger/ntls-ntc:v2)
-
-    # Wait for container to initialize
-    echo "Waiting for container to initialize..."
-    sleep 5
-
-    # Execute command in Docker container and save output (without -it flags)
-    echo "Executing sgx-sigstruct-view command in container..."
-    echo "--- SIGSTRUCT_DATA_START ---"
-    sudo docker exec $TEMP_CONTAINER_ID /bin/bash -c "gramine-sgx-sigstruct-view sgx-mvp.sig"
-    echo "--- SIGSTRUCT_DATA_END ---"
-
-    # Stop and remove the temporary container
-    echo "Stopping and removing temporary container..."
-    sudo docker stop $TEMP_CONTAINER_ID
-    sudo docker rm $TEMP_CONTAINER_ID
-
-    # Remove any existing container with the same name
-    echo "Checking for existing containers with the same name..."
-    if sudo docker ps -a | grep -q ntls-server; then
-        echo "Removing existing ntls-server container..."
-        sudo docker rm -f ntls-server
-    fi
-
-    # Run the final container with the HTTPS port (443)
-    echo "Running final Docker container on HTTPS port..."
-    sudo docker run -d -p 443:8081 \\
-        --restart=unless-stopped \\
-        --name ntls-server \\
-        --device=/dev/sgx_enclave \\
-        --device=/dev/sgx_provision \\
-        binglekruger/ntls-ntc:v2
-
-    # Check if container is running
-    echo "Checking container status..."
-    if sudo docker ps | grep -q ntls-server; then
-        echo "Container 'ntls-server' is running successfully!"
-        echo "The HTTPS server is now accessible at https://$(hostname -I | awk '{print $1}')/health"
-    else
-        echo "WARNING: Container appears to have stopped. Checking logs for errors..."
-        sudo docker logs ntls-server
-    fi
-
-    echo "Setup completed successfully!"
-    '''
-
-            # The script extension needs to be base64-encoded
-            import base64
-            encoded_script = base64.b64encode(script_content.encode()).decode()
-
             # Set up the custom script extension parameters
             extension_name = f"{vm_name}-setup-script"
-            extension_params = {
-                'location': self.location,
-                'publisher': 'Microsoft.Azure.Extensions',
-                'type': 'CustomScript',
-                'type_handler_version': '2.1',
-                'auto_upgrade_minor_version': True,
-                'settings': {
-                    'script': encoded_script
-                },
-                'protected_settings': {}
-            }
+            extension_params = {**self._ext_template}
 
             # Deploy the extension to run the script
-            poller = self.compute_client.virtual_machine_extensions.begin_create_or_update(
+            poller = await run_blocking(
+                self.compute_client.virtual_machine_extensions.begin_create_or_update,
                 self.resource_group,
                 vm_name,
                 extension_name,
-                extension_params
+                extension_params,
+                polling_interval=settings.AZURE_LRO_POLL_SECS
             )
             
             # Wait for the extension to complete
-            extension_result = poller.result()
+            extension_result = await wait_for_poller(poller)
             
             # Check if the extension was successfully deployed
             provisioning_state = extension_result.provisioning_state
             if provisioning_state == 'Succeeded':
-                logger.info(f"Setup script executed successfully on VM: {vm_name}")
+                logger.info("Setup script executed successfully on VM: %s", vm_name)
                 
-                # Get the output of the extension to extract the sigstruct data
-                output = self.compute_client.virtual_machine_extensions.get(
-                    self.resource_group,
-                    vm_name,
-                    extension_name,
-                    expand="instanceView"
-                )
+                # Read back only the saved sigstruct output rather than the extension's whole instance view
+                output = await self._read_sigstruct_output(vm_name)
                 
                 # Parse the output to extract the sigstruct data
                 sigstruct_data = None
-                if output.instance_view and output.instance_view.statuses:
-                    for status in output.instance_view.statuses:
-                        if status.message:
-                            # Look for the sigstruct data in the output
-                            start_marker = "--- SIGSTRUCT_DATA_START ---"
-                            end_marker = "--- SIGSTRUCT_DATA_END ---"
-                            start_index = status.message.find(start_marker)
-                            end_index = status.message.find(end_marker)
+                if output and output.value:
+                    for status in output.value:
+                        # Look for the sigstruct data in the output
+                        block = _SIGSTRUCT_BLOCK_RE.search(status.message or "")
+                        if block:
+                            # Extract the raw output
+                            raw_output = block.group(1).strip()
+                            logger.info("Raw output: %s", raw_output)
                             
-                            if start_index != -1 and end_index != -1:
-                                # Extract the raw output
-                                raw_output = status.message[start_index + len(start_marker):end_index].strip()
-                                logger.info(f"Raw output: {raw_output}")
-                                
-                                # Parse the output to extract the values we want
-                                sigstruct_data = {}
-                                
-                                for line in raw_output.splitlines():
-                                    line = line.strip()
-                                    if line.startswith("mr_signer:"):
-                                        sigstruct_data["mr_signer"] = line.split(":", 1)[1].strip()
-                                    elif line.startswith("mr_enclave:"):
-                                        sigstruct_data["mr_enclave"] = line.split(":", 1)[1].strip()
-                                    elif line.startswith("isv_prod_id:"):
-                                        sigstruct_data["isv_prod_id"] = line.split(":", 1)[1].strip()
-                                    elif line.startswith("isv_svn:"):
-                                        sigstruct_data["isv_svn"] = line.split(":", 1)[1].strip()
-                                
-                                if sigstruct_data:
-                                    logger.info(f"Successfully extracted sigstruct data: {sigstruct_data}")
+                            # Parse the output to extract the values we want
+                            sigstruct_data = dict(_SIGSTRUCT_FIELD_RE.findall(raw_output))
+                            
+                            if sigstruct_data:
+                                logger.info("Successfully extracted sigstruct data: %s", sigstruct_data)
                 
                 return True, sigstruct_data
             else:
-                logger.error(f"Setup script execution failed on VM: {vm_name}. Status: {provisioning_state}")
+                logger.error("Setup script execution failed on VM: %s. Status: %s", vm_name, provisioning_state)
                 return False, None
                 
         except Exception as e:
-            logger.error(f"Failed to run setup script on VM {vm_name}: {str(e)}")
+            logger.error("Failed to run setup script on VM %s: %s", vm_name, e)
             raise
 
+    async def _read_sigstruct_output(self, vm_name):
+        """
+        Read the sigstruct output saved by the setup script with a run command.
+        The VM is already configured at this point, so failures are logged and
+        None is returned instead of failing the deployment.
+        """
+        try:
+            poller = await run_blocking(
+                self.compute_client.virtual_machines.begin_run_command,
+                self.resource_group,
+                vm_name,
+                _read_sigstruct_command(),
+                polling_interval=settings.AZURE_LRO_POLL_SECS
+            )
+            return await asyncio.wait_for(wait_for_poller(poller), timeout=SIGSTRUCT_READ_TIMEOUT_SECS)
+        except Exception as e:
+            logger.warning("Could not read sigstruct output from VM %s: %s", vm_name, e)
+            return None
+
     # Inside the AzureVMDeployer class, add this method
-    async def wait_for_vm_ready(self, vm_name: str, timeout: int = 300, poll_interval: int = 10) -> bool:
+    async def wait_for_vm_ready(self, vm_name: str, timeout: int = 300, initial_interval: float = 1, max_interval: float = 16) -> bool:
         """
         Wait until the VM is fully provisioned and running.
 
         Args:
             vm_name (str): Name of the VM to check.
             timeout (int): Maximum time to wait in seconds (default: 300).
-            poll_interval (int): Time between status checks in seconds (default: 10).
+            initial_interval (float): Delay before the second status check in seconds (default: 1).
+            max_interval (float): Upper bound for the doubling delay between checks in seconds (default: 16).
 
         Returns:
             bool: True if VM is ready, False if timeout occurs.
         """
-        import time
-        logger.info(f"Waiting for VM {vm_name} to be ready...")
+        logger.info("Waiting for VM %s to be ready...", vm_name)
 
+        delay = initial_interval
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
-                instance_view = self.compute_client.virtual_machines.instance_view(
+                instance_view = await run_blocking(
+                    self.compute_client.virtual_machines.instance_view,
                     self.resource_group,
                     vm_name
                 )
-                statuses = instance_view.statuses
-
-                # Check provisioning state and power state
-                provisioning_state = None
-                power_state = None
-                for status in statuses:
-                    if status.code.startswith("ProvisioningState/"):
-                        provisioning_state = status.display_status
-                    if status.code.startswith("PowerState/"):
-                        power_state = status.display_status
+                statuses = _status_map(instance_view)
+                provisioning = statuses.get("ProvisioningState")
+                power = statuses.get("PowerState")
 
-                logger.debug(f"VM {vm_name} - Provisioning: {provisioning_state}, Power: {power_state}")
+                logger.debug("VM %s - Provisioning: %s, Power: %s", vm_name,
+                             provisioning and provisioning.code, power and power.code)
 
                 # VM is ready when provisioning is succeeded and power state is running
-                if (provisioning_state == "Provisioning succeeded" and 
-                    power_state == "VM running"):
-                    logger.info(f"VM {vm_name} is fully provisioned and running.")
+                if (provisioning and provisioning.code == "ProvisioningState/succeeded"
+                        and power and power.code == "PowerState/running"):
+                    logger.info("VM %s is fully provisioned and running.", vm_name)
                     return True
 
-                # Wait before polling again
-                await asyncio.sleep(poll_interval)
-
             except Exception as e:
-                logger.error(f"Error checking VM status for {vm_name}: {str(e)}")
-                await asyncio.sleep(poll_interval)  # Retry after delay
+                logger.error("Error checking VM status for %s: %s", vm_name, e)
+
+            # Back off exponentially before polling again
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_interval)
 
-        logger.error(f"Timeout waiting for VM {vm_name} to be ready after {timeout} seconds.")
+        logger.error("Timeout waiting for VM %s to be ready after %s seconds.", vm_name, timeout)
         return False
 
 
-def main():
+async def deploy_one(deployer, base_name="january-2025"):
+    """Deploy a single VM with its NSG, public IP and NIC. Returns the VM name."""
     try:
-        deployer = AzureVMDeployer()
-        vm_name = deployer.generate_unique_name(base_name="january-2025")
+        vm_name = deployer.generate_unique_name(base_name=base_name)
         nic_name = f"{vm_name}-nic"
         nsg_name = f"{vm_name}-nsg"
         
         # Get subnet ID - you might want to create this if it doesn't exist
-        subnet_id = f"/subscriptions/{deployer.subscription_id}/resourceGroups/{deployer.resource_group}/providers/Microsoft.Network/virtualNetworks/{settings.VNET_NAME}/subnets/{settings.SUBNET_NAME}"
+        subnet_id = await run_blocking(deployer.get_subnet_id)
         
-        logger.info(f"Starting deployment for VM: {vm_name}")
+        logger.info("Starting deployment for VM: %s", vm_name)
 
-        # Step 1: Create NSG
-        nsg = deployer.create_network_security_group(nsg_name)
+        # Step 1: Create NSG and public IP concurrently, they do not depend on each other
+        nsg, pip = await asyncio.gather(
+            deployer.create_network_security_group(nsg_name),
+            deployer.create_public_ip(f"{nic_name}-ip")
+        )
 
-        # Step 2: Create Network Interface with NSG
-        nic = deployer.create_network_interface(nic_name, subnet_id, nsg.id)
+        # Step 2: Create Network Interface with NSG and public IP
+        nic = await deployer.create_network_interface(nic_name, subnet_id, nsg.id, pip.id)
 
         # Step 3: Create VM
-        vm = deployer.create_vm(vm_name, nic.id)
+        vm = await deployer.create_vm(vm_name, nic.id)
 
-        # Step 4: Get public IP
-        public_ip = deployer.get_vm_public_ip(vm_name)
+        # Step 4: The public IP is static, so its address is known from step 1
+        public_ip = pip.ip_address
         
-        logger.info(f"Successfully deployed VM: {vm_name}")
+        logger.info("Successfully deployed VM: %s", vm_name)
         if public_ip:
-            logger.info(f"Public IP address: {public_ip}")
+            logger.info("Public IP address: %s", public_ip)
         
         return vm_name
     
     except Exception as e:
-        logger.error(f"Deployment failed: {str(e)}")
+        logger.error("Deployment failed: %s", e)
         raise
 
+async def deploy_fleet(count, concurrency=16, base_name="january-2025"):
+    """
+    Deploy count VMs with at most concurrency deployments in flight, sharing one
+    deployer. Returns the result of each deployment: the VM name or the exception.
+    """
+    if count < 0:
+        raise ValueError("count must not be negative")
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    deployer = AzureVMDeployer()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deploy_with_limit():
+        async with semaphore:
+            return await deploy_one(deployer, base_name)
+
+    return await asyncio.gather(
+        *(deploy_with_limit() for _ in range(count)),
+        return_exceptions=True
+    )
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {number}")
+    return number
+
+async def main():
+    parser = argparse.ArgumentParser(description="Deploy Azure TEE VMs")
+    parser.add_argument(
+        "--count",
+        type=_non_negative_int,
+        default=1,
+        help="Number of VMs to deploy (default: 1)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=16,
+        help="Maximum number of deployments in flight (default: 16)"
+    )
+    args = parser.parse_args()
+
+    results = await deploy_fleet(args.count, args.concurrency)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {args.count} deployments failed")
+    return results
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Configure logging only when run as a script, importers keep their own config
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
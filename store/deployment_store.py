@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2026 Relational Network
+
+# store/deployment_store.py
+import asyncio
+import zlib
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
+
+
+class ShardedStore:
+    """
+    In-memory deployment store split into lock-striped shards
+
+    Each shard is an immutable snapshot. Writers copy the shard, apply their
+    change and publish the new snapshot under the shard lock, so readers can
+    load the current snapshot without locking.
+    """
+
+    def __init__(self, num_shards: int = 16):
+        """
+        Initialize the store
+
+        Args:
+            num_shards: Number of shards, must be a power of two
+        """
+        if num_shards <= 0 or num_shards & (num_shards - 1):
+            raise ValueError("num_shards must be a power of two")
+        self._mask = num_shards - 1
+        self._shards: List[Mapping[str, Dict[str, Any]]] = [
+            MappingProxyType({}) for _ in range(num_shards)
+        ]
+        # Locks are created on first use so they bind to the running event loop
+        self._locks: List[Optional[asyncio.Lock]] = [None] * num_shards
+
+    def _index(self, key: str) -> int:
+        return zlib.crc32(key.encode()) & self._mask
+
+    def _lock(self, idx: int) -> asyncio.Lock:
+        lock = self._locks[idx]
+        if lock is None:
+            lock = self._locks[idx] = asyncio.Lock()
+        return lock
+
+    async def exists(self, key: str) -> bool:
+        """Return whether an entry exists for key"""
+        return key in self._shards[self._index(key)]
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry for key, or None if it does not exist
+
+        Entries are replaced rather than modified, so the returned dict is a
+        stable snapshot and must not be mutated by the caller.
+        """
+        return self._shards[self._index(key)].get(key)
+
+    def _publish(self, idx: int, key: str, entry: Dict[str, Any]) -> None:
+        shard = dict(self._shards[idx])
+        shard[key] = entry
+        self._shards[idx] = MappingProxyType(shard)
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Insert or replace the entry for key"""
+        idx = self._index(key)
+        async with self._lock(idx):
+            self._publish(idx, key, dict(value))
+
+    async def update(self, key: str, fields: Dict[str, Any]) -> None:
+        """
+        Merge fields into the existing entry for key
+
+        Raises KeyError if there is no entry for key.
+        """
+        idx = self._index(key)
+        async with self._lock(idx):
+            self._publish(idx, key, {**self._shards[idx][key], **fields})
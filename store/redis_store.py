@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2026 Relational Network
+
+# store/redis_store.py
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import redis
+
+from utils.concurrency import run_blocking
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RedisStore:
+    """
+    Deployment store persisted in Redis so state survives process restarts
+    and is shared between the API and deployment workers
+    """
+
+    def __init__(self, url: str, ttl: int = 7 * 24 * 3600, prefix: str = "deployment:"):
+        """
+        Initialize the store
+
+        Args:
+            url: Redis connection URL
+            ttl: Time to keep each entry in seconds (default: 7 days)
+            prefix: Key prefix for deployment entries
+        """
+        # The sync client's connection pool is thread-safe and, unlike an asyncio
+        # client, not bound to one event loop, which matters for Dramatiq jobs that
+        # each run their own loop. Calls go through the thread pool so Redis round
+        # trips never block the event loop.
+        self._client = redis.Redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    async def exists(self, key: str) -> bool:
+        """Return whether an entry exists for key"""
+        return bool(await run_blocking(self._client.exists, self._key(key)))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for key, or None if it does not exist"""
+        raw = await run_blocking(self._client.get, self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Insert or replace the entry for key"""
+        await run_blocking(self._client.setex, self._key(key), self._ttl, json.dumps(value, default=_encode))
+
+    async def update(self, key: str, fields: Dict[str, Any]) -> None:
+        """
+        Merge fields into the existing entry for key
+
+        Uses WATCH/MULTI so a concurrent writer causes a retry instead of a
+        lost update. Raises KeyError if there is no entry for key.
+        """
+        await run_blocking(self._update, key, fields)
+
+    def _update(self, key: str, fields: Dict[str, Any]) -> None:
+        redis_key = self._key(key)
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    raw = pipe.get(redis_key)
+                    if raw is None:
+                        # Missing or expired, a partial entry would not be a valid deployment
+                        raise KeyError(key)
+                    entry = json.loads(raw)
+                    entry.update(fields)
+                    pipe.multi()
+                    pipe.setex(redis_key, self._ttl, json.dumps(entry, default=_encode))
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
@@ -0,0 +1,12 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+# Copyright (C) 2026 Relational Network
+
+# utils/concurrency.py
+import asyncio
+import functools
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call, such as an Azure SDK or Redis request, in the default thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))